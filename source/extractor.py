@@ -0,0 +1,220 @@
+import os
+import gzip
+import shutil
+import tarfile
+import zipfile
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+import utils
+
+logger = logging.getLogger("OrganizerLogger")
+
+# Size of the blocks copied from an archive member to disk, which bounds the memory used by a job
+CHUNK_SIZE = 1024 * 1024
+
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# The worker pool is created on the first archive, with the settings read at that time
+executor_lock = threading.Lock()
+executor = None
+pending_slots = None
+
+class ExtractionLimitError(Exception):
+    """Raised when an archive goes over one of the extraction limits."""
+
+def submit(archive_path):
+    """
+    Queues an archive for extraction and returns immediately.
+    The archive is skipped if max_pending jobs are already waiting, so the sorter never blocks.
+    """
+    global executor, pending_slots
+    with executor_lock:
+        if executor is None:
+            options = utils.get_extraction_options()
+            executor = ThreadPoolExecutor(max_workers=max(1, options["workers"]), thread_name_prefix="OrganizerExtract")
+            pending_slots = threading.BoundedSemaphore(max(1, options["max_pending"]))
+    if not pending_slots.acquire(blocking=False):
+        logger.warning(f"Too many archives waiting for extraction, skipping {os.path.basename(archive_path)}.")
+        return
+    future = executor.submit(extraction_job, archive_path)
+    future.add_done_callback(lambda _: pending_slots.release())
+
+def extraction_job(archive_path):
+    """Extracts an archive on a worker thread and sends the extracted files back to the sorter if enabled."""
+    options = utils.get_extraction_options()
+    try:
+        extracted = extract_archive(archive_path, options)
+    except Exception:
+        logger.exception(f"Error extracting {archive_path}.")
+        return
+    if extracted and options["sort_extracted"]:
+        utils.sort_files(extracted)
+
+def extract_archive(archive_path, options):
+    """
+    Extracts archive_path next to itself and returns the paths of the extracted files.
+    Members are streamed to disk in CHUNK_SIZE blocks. The extraction is stopped and its output
+    removed when the archive goes over max_size_mb, max_members or max_ratio.
+    """
+    lower_name = os.path.basename(archive_path).lower()
+    archive_size = os.path.getsize(archive_path)
+    max_bytes = options["max_size_mb"] * 1024 * 1024
+    if options["max_ratio"] > 0:
+        max_bytes = min(max_bytes, max(archive_size, 1) * options["max_ratio"])
+    budget = {"bytes_left": max_bytes, "members_left": options["max_members"]}
+
+    if lower_name.endswith(TAR_EXTENSIONS):
+        extract_function = extract_tar
+        output_path = unique_path(archive_path, strip_archive_extension(archive_path))
+    elif lower_name.endswith(".zip"):
+        extract_function = extract_zip
+        output_path = unique_path(archive_path, strip_archive_extension(archive_path))
+    elif lower_name.endswith(".7z"):
+        if py7zr is None:
+            logger.info(f"Skipping {os.path.basename(archive_path)}: install py7zr to extract .7z archives.")
+            return []
+        extract_function = extract_7z
+        output_path = unique_path(archive_path, strip_archive_extension(archive_path))
+    elif lower_name.endswith(".gz"):
+        # a plain .gz holds a single file, which is written next to the archive
+        extract_function = extract_gzip
+        output_path = unique_path(archive_path, strip_archive_extension(archive_path), keep_extension=True)
+    else:
+        logger.info(f"Skipping {os.path.basename(archive_path)}: unsupported archive type.")
+        return []
+
+    extracted = []
+    try:
+        extract_function(archive_path, output_path, budget, extracted)
+    except (ExtractionLimitError, zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        logger.warning(f"Extraction of {os.path.basename(archive_path)} stopped: {e}")
+        remove_output(output_path)
+        return []
+    except Exception:
+        remove_output(output_path)
+        raise
+    logger.info(f"Extracted {len(extracted)} files from {os.path.basename(archive_path)} to {output_path}.")
+    return extracted
+
+def extract_zip(archive_path, output_dir, budget, extracted):
+    """Streams every member of a zip archive into output_dir."""
+    with zipfile.ZipFile(archive_path) as archive:
+        members = archive.infolist()
+        # reject obvious bombs from the declared sizes before writing anything
+        if len(members) > budget["members_left"]:
+            raise ExtractionLimitError(f"more than {budget['members_left']} members")
+        if sum(member.file_size for member in members) > budget["bytes_left"]:
+            raise ExtractionLimitError("declared size is over the limit")
+        os.makedirs(output_dir)
+        for member in members:
+            count_member(budget)
+            target_path = member_path(output_dir, member.filename)
+            if member.is_dir():
+                os.makedirs(target_path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            with archive.open(member) as source:
+                copy_stream(source, target_path, budget)
+            extracted.append(target_path)
+
+def extract_tar(archive_path, output_dir, budget, extracted):
+    """Streams every regular file of a (compressed) tar archive into output_dir, reading the archive once."""
+    os.makedirs(output_dir)
+    # stream mode reads the archive sequentially without seeking or loading the index
+    with tarfile.open(archive_path, "r|*") as archive:
+        for member in archive:
+            count_member(budget)
+            target_path = member_path(output_dir, member.name)
+            if member.isdir():
+                os.makedirs(target_path, exist_ok=True)
+            elif member.isfile():
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                source = archive.extractfile(member)
+                copy_stream(source, target_path, budget)
+                extracted.append(target_path)
+            # links and special files are never extracted
+
+def extract_gzip(archive_path, output_path, budget, extracted):
+    """Streams the single file of a .gz archive to output_path."""
+    count_member(budget)
+    with gzip.open(archive_path, "rb") as source:
+        copy_stream(source, output_path, budget)
+    extracted.append(output_path)
+
+def extract_7z(archive_path, output_dir, budget, extracted):
+    """Extracts a 7z archive into output_dir with py7zr, after checking its declared sizes and names."""
+    with py7zr.SevenZipFile(archive_path, mode="r") as archive:
+        members = archive.list()
+        if len(members) > budget["members_left"]:
+            raise ExtractionLimitError(f"more than {budget['members_left']} members")
+        if sum(member.uncompressed or 0 for member in members) > budget["bytes_left"]:
+            raise ExtractionLimitError("declared size is over the limit")
+        for member in members:
+            member_path(output_dir, member.filename)
+        os.makedirs(output_dir)
+        archive.extractall(path=output_dir)
+    for folder, _, files in os.walk(output_dir):
+        extracted.extend(os.path.join(folder, name) for name in files)
+
+def copy_stream(source, target_path, budget):
+    """Copies source to target_path in CHUNK_SIZE blocks, stopping when the byte budget runs out."""
+    with open(target_path, "wb") as target:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            budget["bytes_left"] -= len(chunk)
+            if budget["bytes_left"] < 0:
+                raise ExtractionLimitError("extracted size is over the limit")
+            target.write(chunk)
+
+def count_member(budget):
+    """Counts one more extracted member against the budget."""
+    budget["members_left"] -= 1
+    if budget["members_left"] < 0:
+        raise ExtractionLimitError("too many members")
+
+def member_path(output_dir, member_name) -> str:
+    """Returns where a member is extracted, refusing names that would end up outside output_dir."""
+    path = os.path.normpath(os.path.join(output_dir, member_name))
+    try:
+        inside = os.path.commonpath([output_dir, path]) == output_dir
+    except ValueError:
+        # different drives on Windows
+        inside = False
+    if not inside:
+        raise ExtractionLimitError(f"unsafe member name '{member_name}'")
+    return path
+
+def strip_archive_extension(archive_path) -> str:
+    """Returns archive_path without its archive extension, e.g. 'photos.tar.gz' becomes 'photos'."""
+    lower_path = archive_path.lower()
+    for extension in TAR_EXTENSIONS + (".zip", ".7z", ".gz"):
+        if lower_path.endswith(extension):
+            return archive_path[:-len(extension)]
+    return archive_path
+
+def unique_path(archive_path, path, keep_extension=False) -> str:
+    """Appends (1), (2)... to path, before its extension if keep_extension is set, until nothing with that name exists."""
+    base, extension = os.path.splitext(path) if keep_extension else (path, "")
+    count = 1
+    new_path = path
+    while os.path.exists(new_path) or new_path == archive_path:
+        new_path = base + "(" + str(count) + ")" + extension
+        count += 1
+    return new_path
+
+def remove_output(output_path):
+    """Removes a partially extracted file or folder."""
+    try:
+        if os.path.isdir(output_path):
+            shutil.rmtree(output_path)
+        elif os.path.exists(output_path):
+            os.remove(output_path)
+    except OSError:
+        logger.exception(f"Could not remove partial extraction '{output_path}'.")
@@ -2,7 +2,9 @@ import tkinter as tk
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import threading
+import time
 import utils
+import history
 import sys
 
 # --- Drag and Drop State ---
@@ -75,7 +77,7 @@ def on_drag_end(event, frame):
 
 def open_config_window_threaded():
     """Opens the main configuration window in a separate thread."""
-    config_thread = threading.Thread(target=open_config_window)
+    config_thread = threading.Thread(target=open_config_window, name="ConfigWindow")
     config_thread.daemon = True
     config_thread.start()
 
@@ -169,6 +171,60 @@ def set_window_icon(window):
         utils.logger.warning(f"Could not set window icon from {icon_path}: {e}")
 
 
+def create_history_panel(parent_frame):
+    """Creates the move history search panel at the bottom of the parent_frame."""
+    history_frame = ttk.LabelFrame(parent_frame, text="Move History", padding="5", bootstyle="secondary")
+    history_frame.pack(side="bottom", fill="x", padx=10, pady=5)
+
+    search_frame = ttk.Frame(history_frame)
+    search_frame.pack(fill="x")
+    ttk.Label(search_frame, text="File name:").pack(side="left")
+    search_var = tk.StringVar()
+    search_entry = ttk.Entry(search_frame, textvariable=search_var)
+    search_entry.pack(side="left", fill="x", expand=True, padx=5)
+
+    columns = ("name", "destination", "rule", "size", "date")
+    results = ttk.Treeview(history_frame, columns=columns, show="headings", height=5)
+    for column, heading, width in zip(columns, ("File", "Destination", "Rule", "Size", "Moved"), (150, 300, 80, 70, 130)):
+        results.heading(column, text=heading)
+        results.column(column, width=width, stretch=(column == "destination"))
+    results.pack(fill="x", pady=(5, 0))
+
+    # Latest search request and its rows, shared with the search thread
+    search_state = {"id": 0, "result": None}
+
+    def fill_results(search_id):
+        """Polls from the Tk thread until the search thread is done, then fills the results table."""
+        if search_id != search_state["id"]:
+            return # a newer search replaced this one
+        result = search_state["result"]
+        if result is None or result[0] != search_id:
+            results.after(20, fill_results, search_id)
+            return
+        rows = result[1]
+        results.delete(*results.get_children())
+        for name, destination, rule, size, moved_at in rows:
+            size_text = f"{size / 1024:.0f} KB" if size is not None else ""
+            date_text = time.strftime("%Y-%m-%d %H:%M", time.localtime(moved_at))
+            results.insert("", "end", values=(name, destination, rule or "", size_text, date_text))
+
+    def run_search(event=None):
+        """Queries the history on a separate thread, so the window never waits for the database."""
+        search_state["id"] += 1
+        search_id, query = search_state["id"], search_var.get()
+
+        def search():
+            rows = history.search_moves(query)
+            # an older search finishing late must neither fill the table nor drop a newer result
+            if search_id == search_state["id"]:
+                search_state["result"] = (search_id, rows)
+
+        threading.Thread(target=search, name="HistorySearch", daemon=True).start()
+        results.after(20, fill_results, search_id)
+
+    search_entry.bind("<Return>", run_search)
+    ttk.Button(search_frame, text="Search", command=run_search, bootstyle="secondary").pack(side="left")
+
 config_window_instance = None
 
 def open_config_window():
@@ -193,7 +249,7 @@ def open_config_window():
     
     config_window.protocol("WM_DELETE_WINDOW", config_window.withdraw)
 
-    w, h = 800, 500
+    w, h = 800, 650
     ws, hs = config_window.winfo_screenwidth(), config_window.winfo_screenheight()
     x, y = (ws/2) - (w/2), (hs/2) - (h/2)
     config_window.geometry('%dx%d+%d+%d' % (w, h, x, y))
@@ -252,6 +308,10 @@ def open_config_window():
     )
     apply_button.pack(side="left")
 
+    # --- Move History Search Panel ---
+    # Packed before the canvas so it keeps its space at the bottom of the window
+    create_history_panel(main_frame)
+
     canvas = tk.Canvas(main_frame)
     scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
     scrollable_frame = ttk.Frame(canvas)
@@ -311,7 +371,7 @@ def open_edit_window(rule, parent_window, frame_to_refresh):
     edit_window = tk.Toplevel(parent_window)
     set_window_icon(edit_window)
     edit_window.title("Edit "+ rule.get("name"))
-    w, h = 350, 300
+    w, h = 350, 340
     ws, hs = edit_window.winfo_screenwidth(), edit_window.winfo_screenheight()
     x, y = (ws/2) - (w/2), (hs/2) - (h/2)
     edit_window.geometry('%dx%d+%d+%d' % (w,h,x,y))
@@ -329,6 +389,7 @@ def open_edit_window(rule, parent_window, frame_to_refresh):
     keywords_var = tk.StringVar(value=", ".join(rule.get("keywords", [])))
     destination_var = tk.StringVar(value=rule.get("destination", ""))
     sub_var = tk.BooleanVar(value=rule.get("sub", False))
+    extract_var = tk.BooleanVar(value=rule.get("extract", False))
 
     # --- Form Fields ---
     # Rule Name (read-only, as it's the identifier)
@@ -350,6 +411,9 @@ def open_edit_window(rule, parent_window, frame_to_refresh):
     # Sub-folder Checkbox
     ttk.Checkbutton(form_frame, text="Create as sub-folder in Downloads", variable=sub_var).grid(row=4, column=0, columnspan=2, sticky="w", pady=5)
 
+    # Extract Checkbox
+    ttk.Checkbutton(form_frame, text="Extract archives after moving", variable=extract_var).grid(row=5, column=0, columnspan=2, sticky="w", pady=5)
+
     # Make the second column stretchable
     form_frame.columnconfigure(1, weight=1)
 
@@ -370,7 +434,8 @@ def open_edit_window(rule, parent_window, frame_to_refresh):
             "extensions": extensions_list,
             "keywords": keywords_list,
             "destination": destination_var.get(),
-            "sub": sub_var.get()
+            "sub": sub_var.get(),
+            "extract": extract_var.get()
         }
 
         # Save to config file and refresh UI
@@ -386,7 +451,7 @@ def open_add_window(parent_window, frame_to_refresh):
     add_window = tk.Toplevel(parent_window)
     set_window_icon(add_window)
     add_window.title("Add New Rule")
-    w, h = 350, 300
+    w, h = 350, 340
     ws, hs = add_window.winfo_screenwidth(), add_window.winfo_screenheight()
     x, y = (ws/2) - (w/2), (hs/2) - (h/2)
     add_window.geometry('%dx%d+%d+%d' % (w, h, x, y))
@@ -403,6 +468,7 @@ def open_add_window(parent_window, frame_to_refresh):
     keywords_var = tk.StringVar()
     destination_var = tk.StringVar()
     sub_var = tk.BooleanVar(value=True) # Default to true
+    extract_var = tk.BooleanVar(value=False)
 
     # --- Form Fields (Name is now editable) ---
     ttk.Label(form_frame, text="Rule Name:").grid(row=0, column=0, sticky="w", pady=2)
@@ -418,6 +484,7 @@ def open_add_window(parent_window, frame_to_refresh):
     ttk.Entry(form_frame, textvariable=destination_var).grid(row=3, column=1, sticky="ew", pady=2)
 
     ttk.Checkbutton(form_frame, text="Create as sub-folder in Downloads", variable=sub_var).grid(row=4, column=0, columnspan=2, sticky="w", pady=5)
+    ttk.Checkbutton(form_frame, text="Extract archives after moving", variable=extract_var).grid(row=5, column=0, columnspan=2, sticky="w", pady=5)
     form_frame.columnconfigure(1, weight=1)
 
     # --- Save and Cancel Buttons ---
@@ -440,7 +507,8 @@ def open_add_window(parent_window, frame_to_refresh):
             "extensions": extensions_list,
             "keywords": keywords_list,
             "destination": destination_var.get().strip(),
-            "sub": sub_var.get()
+            "sub": sub_var.get(),
+            "extract": extract_var.get()
         }
 
         utils.add_rule(new_rule) # Call the new utility function
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+import utils
+
+logger = logging.getLogger("OrganizerLogger")
+
+# Serializes writers; SQLite itself handles readers from other connections
+history_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS moves (
+    id INTEGER PRIMARY KEY,
+    source_name TEXT NOT NULL COLLATE NOCASE,
+    destination TEXT NOT NULL,
+    rule TEXT,
+    size INTEGER,
+    moved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_moves_name_time ON moves (source_name COLLATE NOCASE, moved_at DESC);
+CREATE INDEX IF NOT EXISTS idx_moves_moved_at ON moves (moved_at, source_name);
+"""
+
+# Prefixes with at most this many matches are sorted by time from the name index,
+# more common ones are found by walking the time index from the newest move
+SEARCH_SORT_LIMIT = 100000
+
+def history_path():
+    """Returns the path of the move-history database in the AppData directory."""
+    return os.path.join(utils.log_dir_path(), "history.db")
+
+def connect():
+    """Opens a connection to the history database, creating the schema if needed."""
+    connection = sqlite3.connect(history_path(), timeout=10)
+    # WAL lets the GUI search while the sorter is writing
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+def record_moves(moves):
+    """
+    Inserts a batch of moves in a single transaction.
+    Each move is a tuple (source_name, destination, rule, size, moved_at).
+    """
+    if not moves:
+        return
+    with history_lock:
+        try:
+            connection = connect()
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO moves (source_name, destination, rule, size, moved_at) VALUES (?, ?, ?, ?, ?)",
+                        moves
+                    )
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            logger.exception("Error writing move history.")
+
+def search_moves(query, limit=200):
+    """
+    Returns the most recent moves whose file name starts with query (case-insensitive),
+    as tuples (source_name, destination, rule, size, moved_at).
+    An empty query returns the most recent moves.
+    """
+    query = query.strip()
+    try:
+        connection = connect()
+        try:
+            if not query:
+                cursor = connection.execute(
+                    "SELECT source_name, destination, rule, size, moved_at FROM moves "
+                    "ORDER BY moved_at DESC LIMIT ?",
+                    (limit,)
+                )
+                return cursor.fetchall()
+            # Escape LIKE wildcards so the prefix match stays on the indexes
+            pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            # Counting stops at SEARCH_SORT_LIMIT + 1 and only reads the name index
+            matches = connection.execute(
+                "SELECT count(*) FROM (SELECT 1 FROM moves INDEXED BY idx_moves_name_time "
+                "WHERE source_name LIKE ? ESCAPE '\\' LIMIT ?)",
+                (pattern, SEARCH_SORT_LIMIT + 1)
+            ).fetchone()[0]
+            if matches <= SEARCH_SORT_LIMIT:
+                # few matches: read them from the name index and sort them by time
+                index = "idx_moves_name_time"
+            else:
+                # many matches: they are common enough to be met early walking back in time
+                index = "idx_moves_moved_at"
+            cursor = connection.execute(
+                f"SELECT source_name, destination, rule, size, moved_at FROM moves INDEXED BY {index} "
+                "WHERE source_name LIKE ? ESCAPE '\\' ORDER BY moved_at DESC LIMIT ?",
+                (pattern, limit)
+            )
+            return cursor.fetchall()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        logger.exception("Error searching move history.")
+        return []
+
+def compact_history(retention_days, max_records):
+    """Deletes moves older than retention_days and keeps at most max_records of the newest ones."""
+    with history_lock:
+        try:
+            connection = connect()
+            try:
+                with connection:
+                    deleted = 0
+                    if retention_days > 0:
+                        cutoff = time.time() - retention_days * 24 * 60 * 60
+                        deleted += connection.execute("DELETE FROM moves WHERE moved_at < ?", (cutoff,)).rowcount
+                    if max_records > 0:
+                        deleted += connection.execute(
+                            "DELETE FROM moves WHERE moved_at < "
+                            "(SELECT moved_at FROM moves ORDER BY moved_at DESC LIMIT 1 OFFSET ?)",
+                            (max_records - 1,)
+                        ).rowcount
+                if deleted:
+                    logger.info(f"Removed {deleted} old entries from move history.")
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            logger.exception("Error compacting move history.")
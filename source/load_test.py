@@ -0,0 +1,231 @@
+"""
+End-to-end latency load test for the organizer, runs without a display (e.g. in the Docker image):
+
+    python source/load_test.py --duration 60 --rate 50
+
+A simulated downloader process writes files into a temporary Downloads folder while the sorting
+loop runs headless in this process. The time between a file appearing and its move being recorded
+in the history is reported as p50/p95/p99 latency, with the throughput and the CPU used.
+Files moved before the downloader finished writing them are counted, with their latency from
+the end of the write.
+"""
+import os
+import sys
+import math
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+# Chunk written at a time by the simulated downloader
+WRITE_CHUNK = 64 * 1024
+
+def downloader(downloads_dir, options, manifest):
+    """
+    Writes files into downloads_dir at options.rate files per second for options.duration seconds.
+    Every file is reported on manifest as ("created", file_id, name, created_at, size, slow) when it
+    appears, then ("completed", file_id, completed_at) when it is fully written; None marks the end.
+    """
+    rng = random.Random(options.seed)
+    extensions = options.extensions.split(",")
+    slow_writers = []
+    interval = 1.0 / options.rate
+    start = time.time()
+    count = 0
+    while time.time() - start < options.duration:
+        count += 1
+        extension = rng.choice(extensions)
+        # collisions reuse a few names, like repeated downloads of the same file
+        if rng.random() < options.collision_fraction:
+            base = f"report{rng.randint(1, 3)}"
+        else:
+            base = f"download_{count}"
+        size = rng.randint(options.min_size, options.max_size)
+        created_at = time.time()
+        name, f = create_file(downloads_dir, base, extension)
+        slow = rng.random() < options.slow_fraction
+        manifest.put(("created", count, name, created_at, size, slow))
+        if slow:
+            # slow partial write: the file exists long before it is complete
+            writer = threading.Thread(target=write_file, args=(f, size, options.slow_seconds, manifest, count))
+            writer.start()
+            slow_writers.append(writer)
+        else:
+            write_file(f, size, 0, manifest, count)
+        # keep the rate steady whatever the write time
+        time.sleep(max(0, start + count * interval - time.time()))
+    for writer in slow_writers:
+        writer.join()
+    manifest.put(None)
+
+def create_file(downloads_dir, base, extension):
+    """Creates a file whose name is not in downloads_dir yet, numbering it like browsers do, and returns its name and handle."""
+    name = base + extension
+    count = 1
+    while True:
+        try:
+            return name, open(os.path.join(downloads_dir, name), "xb")
+        except FileExistsError:
+            name = f"{base} ({count}){extension}"
+            count += 1
+
+def write_file(f, size, seconds, manifest, file_id):
+    """Writes size bytes to the open file f in WRITE_CHUNK blocks spread over seconds, closes it and reports it on manifest."""
+    chunks = max(1, size // WRITE_CHUNK)
+    with f:
+        for i in range(chunks):
+            f.write(b"\0" * (size // chunks + (size % chunks if i == chunks - 1 else 0)))
+            if seconds:
+                f.flush()
+                time.sleep(seconds / chunks)
+    manifest.put(("completed", file_id, time.time()))
+
+def sorting_loop(stop_event, poll, cpu):
+    """
+    Headless equivalent of main.organize_files_loop, with a poll interval in seconds instead of minutes.
+    Stores the CPU time used by this thread in cpu["sorter"] when it stops.
+    """
+    import utils
+    start = time.thread_time()
+    while not stop_event.is_set():
+        utils.file_sorter()
+        stop_event.wait(poll)
+    cpu["sorter"] = time.thread_time() - start
+
+def percentile(values, percent):
+    """Returns the nearest-rank percentile of sorted values."""
+    if not values:
+        return float("nan")
+    index = max(0, min(len(values) - 1, math.ceil(percent / 100 * len(values)) - 1))
+    return values[index]
+
+def match_moves(files, moves):
+    """
+    Pairs every created file with its move by name, in creation order, and adds the move time,
+    the size recorded when it was moved and its destination to the file entry.
+    Returns the entries of the files that were placed.
+    """
+    moves_by_name = {}
+    for source_name, destination, rule, size, moved_at in sorted(moves, key=lambda move: move[4]):
+        moves_by_name.setdefault(source_name, []).append((moved_at, size, destination))
+    placed = []
+    for entry in sorted(files, key=lambda entry: entry["created_at"]):
+        if moves_by_name.get(entry["name"]):
+            entry["moved_at"], entry["moved_size"], entry["destination"] = moves_by_name[entry["name"]].pop(0)
+            placed.append(entry)
+    return placed
+
+def print_latencies(label, latencies):
+    """Prints the p50/p95/p99 and max of latencies in seconds, as milliseconds."""
+    latencies = sorted(latencies)
+    maximum = latencies[-1] if latencies else float("nan")
+    print(f"{label} p50/p95/p99/max: {percentile(latencies, 50) * 1000:.0f} / {percentile(latencies, 95) * 1000:.0f} / "
+          f"{percentile(latencies, 99) * 1000:.0f} / {maximum * 1000:.0f} ms")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Measure how long files wait in Downloads under sustained load.")
+    parser.add_argument("--duration", type=float, default=30, help="seconds the downloader writes files")
+    parser.add_argument("--rate", type=float, default=20, help="files written per second")
+    parser.add_argument("--min-size", type=int, default=1024, help="minimum file size in bytes")
+    parser.add_argument("--max-size", type=int, default=1024 * 1024, help="maximum file size in bytes")
+    parser.add_argument("--extensions", default=".pdf,.txt,.jpg,.png,.zip,.exe", help="comma-separated extensions to write")
+    parser.add_argument("--slow-fraction", type=float, default=0.1, help="share of files written slowly")
+    parser.add_argument("--slow-seconds", type=float, default=2, help="time a slow file takes to be written")
+    parser.add_argument("--collision-fraction", type=float, default=0.1, help="share of files reusing a name")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between two sorting passes")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="seconds to wait for the last files to be sorted")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the downloader")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary root after the run")
+    return parser.parse_args()
+
+def main():
+    options = parse_arguments()
+    root = tempfile.mkdtemp(prefix="organizer-load-")
+    # Downloads, logs and history all go to the temporary root
+    os.environ["HOME"] = root
+    os.environ["APPDATA"] = root
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import utils
+    import history
+
+    # the rules come from the shipped config, but nothing is written back to it
+    config = utils.load_config() or {}
+    config["create_missing_destinations"] = True
+    config["recursive"] = {"enabled": False}
+    for rule in config.get("rules", []):
+        rule["extract"] = False
+    utils.load_config = lambda: config
+    # never the real Downloads folder, even on Windows where it comes from the registry
+    downloads_dir = os.path.join(root, "Downloads")
+    utils.locate_folder_path = lambda: downloads_dir
+    os.makedirs(downloads_dir, exist_ok=True)
+
+    print(f"Root: {root}")
+    print(f"Writing {options.rate:g} files/s for {options.duration:g}s, sorting every {options.poll:g}s...")
+    manifest = multiprocessing.Queue()
+    writer = multiprocessing.Process(target=downloader, args=(downloads_dir, options, manifest))
+
+    stop_event = threading.Event()
+    cpu = {}
+    sorter = threading.Thread(target=sorting_loop, args=(stop_event, options.poll, cpu), name="Sorter", daemon=True)
+    cpu_start, wall_start = time.process_time(), time.time()
+    sorter.start()
+    writer.start()
+
+    # read the manifest while the downloader runs, so its queue never fills up
+    files_by_id = {}
+    while True:
+        message = manifest.get()
+        if message is None:
+            break
+        if message[0] == "created":
+            _, file_id, name, created_at, size, slow = message
+            files_by_id[file_id] = {"name": name, "created_at": created_at, "size": size, "slow": slow}
+        else:
+            _, file_id, completed_at = message
+            files_by_id[file_id]["completed_at"] = completed_at
+    writer.join()
+    files = list(files_by_id.values())
+
+    # wait for the last files to be sorted
+    deadline = time.time() + options.drain_timeout
+    moves = []
+    while time.time() < deadline:
+        moves = history.search_moves("", limit=len(files) * 2 + 1)
+        if len(moves) >= len(files):
+            break
+        time.sleep(options.poll)
+    stop_event.set()
+    sorter.join()
+    wall_time, cpu_time = time.time() - wall_start, time.process_time() - cpu_start
+    moves = history.search_moves("", limit=len(files) * 2 + 1)
+
+    placed = match_moves(files, moves)
+    # the history records the size at move time, so a smaller one means the write was still going on
+    incomplete = [entry for entry in placed if entry["moved_size"] < entry["size"]]
+    # what the user ends up with, once every write has finished
+    damaged = [entry for entry in placed if not os.path.isfile(entry["destination"]) or os.path.getsize(entry["destination"]) != entry["size"]]
+    slow_placed = [entry for entry in placed if entry["slow"]]
+
+    print(f"Files written:   {len(files)} ({sum(entry['slow'] for entry in files)} slow)")
+    print(f"Files placed:    {len(placed)} ({len(files) - len(placed)} left in Downloads)")
+    print_latencies("Latency", [entry["moved_at"] - entry["created_at"] for entry in placed])
+    print(f"Moved while still being written: {len(incomplete)} ({len(damaged)} not complete at their destination)")
+    if slow_placed:
+        # negative: the file was moved that long before its write finished
+        print_latencies("Slow files, latency from write end (negative = moved early)", [entry["moved_at"] - entry["completed_at"] for entry in slow_placed])
+    print(f"Throughput:      {len(placed) / wall_time:.1f} files/s")
+    # the sorter thread alone, without the folder scan workers; the process also runs this harness
+    print(f"Sorter thread CPU: {cpu['sorter']:.2f}s ({cpu['sorter'] / wall_time * 100:.1f}% of one core)")
+    print(f"Process CPU:       {cpu_time:.2f}s ({cpu_time / wall_time * 100:.1f}% of one core, includes scan workers and the harness)")
+
+    if options.keep:
+        print(f"Kept {root}")
+    else:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
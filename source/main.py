@@ -5,6 +5,8 @@ import pystray
 from PIL import Image
 import utils
 import gui
+import history
+import profiler
 import logging
 import os
 
@@ -12,10 +14,19 @@ import os
 logger = utils.setup_logging()
 stop_event = threading.Event()
 
+# Seconds between two compactions of the move history
+HISTORY_COMPACT_PERIOD = 24 * 60 * 60
+
 def organize_files_loop():
     """Run file sorter every set amount of time read from config file"""
+    last_compaction = 0
     while not stop_event.is_set():
-        utils.file_sorter()
+        # Runs under cProfile when profiling was requested from the tray or a signal
+        profiler.run_pass(utils.file_sorter)
+        # Apply the history retention policy at most once a day
+        if time.time() - last_compaction >= HISTORY_COMPACT_PERIOD:
+            history.compact_history(*utils.get_history_retention())
+            last_compaction = time.time()
         # Use a short sleep and check the interval inside the loop
         # to make it responsive to changes.
         interval_seconds = utils.get_interval() * 60
@@ -38,7 +49,13 @@ def run_tray_icon():
         image_path = utils.root_path("resources/broom.png")
         image = Image.open(image_path)
         # Use a lambda to avoid issues with passing the icon object to the exit function
-        menu = (item('Configure Rules', gui.open_config_window_threaded), item('Exit', lambda: exit_action()))
+        profiling_menu = pystray.Menu(
+            item(f'Profile next {profiler.PROFILE_PASSES} sorts', lambda: profiler.profile_next_passes()),
+            item('Memory snapshot', lambda: profiler.memory_snapshot()),
+            item('Stop memory tracing', lambda: profiler.stop_memory_tracing()),
+            item('Dump thread stacks', lambda: profiler.dump_thread_stacks()),
+        )
+        menu = (item('Configure Rules', gui.open_config_window_threaded), item('Profiling', profiling_menu), item('Exit', lambda: exit_action()))
         icon = pystray.Icon("Organizer", image, "Organizer", menu)
         logger.info("Attempting to start system tray icon.")
         icon.run()
@@ -50,14 +67,17 @@ def run_tray_icon():
 
 def main():
     """Main function to start the application."""
+    # Profiling controls for when there is no tray icon, set up before any thread starts
+    profiler.install_signal_handlers()
+
     # Start the background file organizer thread
-    organization_thread = threading.Thread(target=organize_files_loop)
+    organization_thread = threading.Thread(target=organize_files_loop, name="Sorter")
     organization_thread.daemon = True
     organization_thread.start()
 
     # Start the system tray icon in its own thread.
     # If it fails, it will not block the main application.
-    tray_thread = threading.Thread(target=run_tray_icon)
+    tray_thread = threading.Thread(target=run_tray_icon, name="Tray")
     tray_thread.daemon = True
     tray_thread.start()
 
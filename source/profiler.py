@@ -0,0 +1,145 @@
+import os
+import io
+import sys
+import time
+import cProfile
+import pstats
+import signal
+import threading
+import traceback
+import tracemalloc
+import logging
+import utils
+
+logger = logging.getLogger("OrganizerLogger")
+
+# Number of file_sorter passes profiled by the tray menu and the signal handler
+PROFILE_PASSES = 5
+# Number of lines written in the CPU and memory reports
+REPORT_LINES = 40
+
+profiler_lock = threading.Lock()
+profiler_state = {
+    "passes_left": 0,
+    "profile": None,
+    "snapshot": None,
+}
+
+def report_path(kind, extension="txt"):
+    """Returns a new timestamped report path in the AppData log directory."""
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(utils.log_dir_path(), f"{kind}-{timestamp}.{extension}")
+
+def profile_next_passes(passes=PROFILE_PASSES):
+    """Profiles the next passes of file_sorter with cProfile. The report is written after the last one."""
+    with profiler_lock:
+        if profiler_state["passes_left"] == 0:
+            profiler_state["profile"] = cProfile.Profile()
+        profiler_state["passes_left"] = passes
+    logger.info(f"Profiling the next {passes} sorting passes.")
+
+def run_pass(function):
+    """Runs one sorting pass, under cProfile if profile_next_passes asked for it."""
+    with profiler_lock:
+        profile = profiler_state["profile"] if profiler_state["passes_left"] > 0 else None
+    if profile is None:
+        return function()
+    try:
+        return profile.runcall(function)
+    finally:
+        with profiler_lock:
+            profiler_state["passes_left"] -= 1
+            finished = profiler_state["passes_left"] == 0
+            if finished:
+                profiler_state["profile"] = None
+        if finished:
+            write_cpu_report(profile)
+
+def write_cpu_report(profile):
+    """Writes the collected cProfile stats as text and in binary form for external viewers."""
+    try:
+        path = report_path("cpu-profile")
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_LINES)
+        with open(path, "w") as f:
+            f.write(stream.getvalue())
+        stats.dump_stats(os.path.splitext(path)[0] + ".prof")
+        logger.info(f"CPU profile written to {path}")
+    except Exception:
+        logger.exception("Error writing CPU profile.")
+
+def memory_snapshot():
+    """
+    Takes a tracemalloc snapshot. The first call starts tracing, every later call writes
+    the allocations that grew the most since the previous snapshot.
+    """
+    with profiler_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            profiler_state["snapshot"] = tracemalloc.take_snapshot()
+            logger.info("Memory tracing started, take another snapshot to get a report.")
+            return
+        previous = profiler_state["snapshot"]
+        current = tracemalloc.take_snapshot()
+        profiler_state["snapshot"] = current
+    try:
+        path = report_path("memory-diff")
+        current_size, peak_size = tracemalloc.get_traced_memory()
+        with open(path, "w") as f:
+            f.write(f"Traced memory: {current_size / 1024:.1f} KiB, peak {peak_size / 1024:.1f} KiB\n\n")
+            for stat in current.compare_to(previous, "lineno")[:REPORT_LINES]:
+                f.write(f"{stat}\n")
+        logger.info(f"Memory snapshot diff written to {path}")
+    except Exception:
+        logger.exception("Error writing memory snapshot diff.")
+
+def stop_memory_tracing():
+    """Stops tracemalloc and frees its snapshots."""
+    with profiler_lock:
+        profiler_state["snapshot"] = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("Memory tracing stopped.")
+
+def dump_thread_stacks():
+    """Writes the current stack of every thread (sorter, tray, GUI, workers) to a report."""
+    try:
+        path = report_path("thread-stacks")
+        frames = sys._current_frames()
+        with open(path, "w") as f:
+            for thread in threading.enumerate():
+                f.write(f"--- {thread.name} (id {thread.ident}, daemon {thread.daemon}) ---\n")
+                frame = frames.get(thread.ident)
+                if frame is not None:
+                    f.write("".join(traceback.format_stack(frame)))
+                f.write("\n")
+        logger.info(f"Thread stacks written to {path}")
+    except Exception:
+        logger.exception("Error writing thread stacks.")
+
+def install_signal_handlers():
+    """
+    Binds the profiling controls to signals for headless runs (POSIX only):
+    SIGUSR1 dumps the thread stacks, SIGUSR2 profiles the next passes and takes a memory snapshot.
+    The signals are received by a dedicated thread with sigwait, because Python handlers only run
+    on the main thread, which sits in the Tk mainloop and may not run Python code for a long time.
+    Must be called from the main thread before any other thread starts, so they all inherit the mask.
+    """
+    if not hasattr(signal, "SIGUSR1") or not hasattr(signal, "sigwait"):
+        return
+    profiling_signals = {signal.SIGUSR1, signal.SIGUSR2}
+    # blocked everywhere, so the kernel keeps them pending for sigwait
+    signal.pthread_sigmask(signal.SIG_BLOCK, profiling_signals)
+
+    def wait_for_signals():
+        while True:
+            signum = signal.sigwait(profiling_signals)
+            if signum == signal.SIGUSR1:
+                dump_thread_stacks()
+            else:
+                profile_next_passes()
+                memory_snapshot()
+
+    threading.Thread(target=wait_for_signals, name="ProfilerSignals", daemon=True).start()
+    logger.info(f"Profiling signals ready: kill -USR1 {os.getpid()} for thread stacks, kill -USR2 for CPU and memory profiles.")
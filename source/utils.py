@@ -9,12 +9,34 @@ except ImportError:
 import yaml
 import threading
 import logging
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from logging.handlers import RotatingFileHandler
+import history
+import extractor
 
 logger = logging.getLogger("OrganizerLogger")
 
 config_lock = threading.RLock()
 
+# Held while a file gets its final name and is moved, so the sorter and the extraction
+# workers can never pick the same free name in a destination and overwrite each other
+move_lock = threading.Lock()
+
+# Seconds between two checks of the cached Downloads path and destination folders
+PATHS_CHECK_PERIOD = 60
+
+# Cached Downloads path and resolved rule destinations, see resolve_destinations
+paths_lock = threading.Lock()
+paths_cache = {
+    "version": None,
+    "checked_at": 0,
+    "downloads_dir": None,
+    "downloads_checked_at": 0,
+    "destinations": {},
+}
+
 def root_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
     try:
@@ -32,12 +54,16 @@ def appdata_path():
     else:
         return os.path.join(os.path.expanduser('~'), '.organizer')
 
-def setup_logging():
-    """Sets up a rotating log file in the AppData directory."""
-    appdata = appdata_path()
-    log_dir = os.path.join(appdata, "Organizer")
+def log_dir_path():
+    """Returns the Organizer directory in AppData that holds the logs, creating it if needed."""
+    log_dir = os.path.join(appdata_path(), "Organizer")
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
+    return log_dir
+
+def setup_logging():
+    """Sets up a rotating log file in the AppData directory."""
+    log_dir = log_dir_path()
     log_file = os.path.join(log_dir, "organizer.log")
 
     # Create a logger
@@ -77,6 +103,80 @@ def locate_folder_path() -> Optional[str]:
     else: # macOS and Linux
         return os.path.join(os.path.expanduser('~'), 'Downloads')
 
+def downloads_folder_path() -> Optional[str]:
+    """Returns the cached Downloads folder path, looking it up again at most every PATHS_CHECK_PERIOD seconds."""
+    with paths_lock:
+        if paths_cache["downloads_dir"] is None or time.time() - paths_cache["downloads_checked_at"] >= PATHS_CHECK_PERIOD:
+            paths_cache["downloads_dir"] = locate_folder_path()
+            paths_cache["downloads_checked_at"] = time.time()
+            # the destinations depend on the Downloads path, so they are rebuilt too
+            paths_cache["version"] = None
+        return paths_cache["downloads_dir"]
+
+def config_version():
+    """Returns a value that changes every time config.yaml is modified."""
+    try:
+        stat = os.stat(root_path(os.path.join('resources', 'config.yaml')))
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+def normalize_destination(destination, downloads_dir, sub) -> str:
+    """
+    Returns the absolute, normalized path of a rule destination.
+    Both '\\' and '/' are accepted as separators, so 'Documents\\' works on every platform.
+    """
+    destination = destination.replace("\\", os.sep).replace("/", os.sep)
+    if sub:
+        destination = os.path.join(downloads_dir, destination)
+    return os.path.normpath(os.path.abspath(os.path.expanduser(destination)))
+
+def resolve_destinations(rules, downloads_dir):
+    """
+    Returns a table mapping each rule's (destination, sub) to its resolved folder:
+    {"path": normalized absolute path, "exists": bool}.
+    The table is rebuilt when config.yaml or the rules' destinations change, and the folders
+    are checked again at most every PATHS_CHECK_PERIOD seconds instead of once per file.
+    """
+    # the keys are part of the version, so the table always covers every rule passed in,
+    # even when config.yaml is saved between reading the rules and reading its version
+    keys = frozenset((rule["destination"], bool(rule.get("sub"))) for rule in rules)
+    version = (config_version(), downloads_dir, keys)
+    with paths_lock:
+        if paths_cache["version"] == version and time.time() - paths_cache["checked_at"] < PATHS_CHECK_PERIOD:
+            return paths_cache["destinations"]
+
+        create_missing = get_create_missing_destinations()
+        previous = paths_cache["destinations"]
+        destinations = {}
+        for rule in rules:
+            key = (rule["destination"], bool(rule.get("sub")))
+            if key in destinations:
+                continue
+            path = normalize_destination(rule["destination"], downloads_dir, rule.get("sub"))
+            if not os.path.isdir(path) and create_missing:
+                try:
+                    os.makedirs(path, exist_ok=True)
+                    logger.info(f"Created missing destination '{path}'.")
+                except OSError:
+                    logger.exception(f"Could not create destination '{path}'.")
+            exists = os.path.isdir(path)
+            # only warn when a destination goes missing, not on every check
+            if not exists and previous.get(key, {}).get("exists", True):
+                logger.warning(f"Destination '{path}' of rule {rule.get('name')} does not exist, matching files are skipped.")
+            destinations[key] = {"path": path, "exists": exists}
+
+        paths_cache["version"] = version
+        paths_cache["checked_at"] = time.time()
+        paths_cache["destinations"] = destinations
+        return destinations
+
+def invalidate_paths():
+    """Forces the Downloads path and the destinations to be resolved again on next use."""
+    with paths_lock:
+        paths_cache["version"] = None
+        paths_cache["downloads_dir"] = None
+
 def load_config():
     """Returns the content of config.yaml"""
     # get the directory where the script is located
@@ -107,6 +207,38 @@ def get_interval():
     config = load_config()
     return config.get("interval", 5) if config else 5
 
+def get_history_retention():
+    """Returns the history retention in days and the maximum number of history records from the config."""
+    config = load_config()
+    history_config = config.get("history", {}) if config else {}
+    return history_config.get("retention_days", 365), history_config.get("max_records", 5000000)
+
+def get_recursive_options():
+    """Returns whether subfolders of Downloads are sorted and how deep the scan goes from the config."""
+    config = load_config()
+    recursive_config = config.get("recursive", {}) if config else {}
+    return recursive_config.get("enabled", False), recursive_config.get("max_depth", 3)
+
+def get_create_missing_destinations():
+    """Returns whether missing rule destinations are created automatically from the config."""
+    config = load_config()
+    return config.get("create_missing_destinations", False) if config else False
+
+def get_extraction_options():
+    """Returns the archive extraction settings from the config, with defaults for the missing ones."""
+    config = load_config()
+    options = {
+        "workers": 2,
+        "max_pending": 16,
+        "max_size_mb": 4096,
+        "max_members": 10000,
+        "max_ratio": 200,
+        "sort_extracted": False,
+    }
+    if config and isinstance(config.get("extraction"), dict):
+        options.update(config["extraction"])
+    return options
+
 def save_interval(interval_minutes):
     """Saves the sorting interval to the config.yaml file."""
     if interval_minutes <= 0:
@@ -127,6 +259,8 @@ def save_config(config):
     with config_lock:
         with open(config_file, "w") as f:
             yaml.dump(config, f, default_flow_style=False)
+    # rules may point to new destinations
+    invalidate_paths()
 
 def update_rule(updated_rule):
     """Update an existing rule in the config."""
@@ -174,61 +308,166 @@ def add_rule(new_rule):
 def file_sorter():
     """Reads all the files in the default Download directory and moves them following the rulers in config.yaml"""
     # locate Download directory
-    downloads_dir = locate_folder_path()
+    downloads_dir = downloads_folder_path()
 
     # load sorting rules
     rules = get_rules()
 
-    if not rules:
+    if not rules or not downloads_dir:
         return
+    # subfolders are only scanned when recursive sorting is enabled
+    recursive, max_depth = get_recursive_options()
+    if not recursive:
+        max_depth = 0
+
+    # resolved once per config version, not once per file
+    destinations = resolve_destinations(rules, downloads_dir)
+    # never sort the content of the rule destinations again
+    excluded_dirs = {destination["path"] for destination in destinations.values()}
+
+    # moves are collected here and written to the history in one batch
+    moves = []
     # scan folder and check files 
     try:
-        for filename in os.listdir(downloads_dir):
-            # build file path
-            file_path = os.path.join(downloads_dir, filename)
-            
-            # check if file
-            if not os.path.isfile(file_path):
-                continue
-        
-            # get file name and extension
-            file_name, file_extension = os.path.splitext(file_path)
-
-            # Check against each rule
-            for rule in rules:
-
-                # Check if the file extension matches
-                match_extension = file_extension in rule.get("extensions", [])
-                
-                # Check if any keyword matches
-                match_keyword = False
-                if rule.get("keywords"):
-                    match_keyword = any(keyword.lower() in file_name for keyword in rule["keywords"])
-
-                if match_extension or match_keyword:
-                    # check if destination is sub-folder
-                    if rule["sub"]:
-                        destination_folder = os.path.join(downloads_dir, rule["destination"])
-                    else:
-                        destination_folder = rule["destination"]
-                    # check if destination folder exists
-                    if not os.path.isdir(destination_folder):
-                        continue
-                    
-                    file_path = get_final_name(file_path, file_name, file_extension, destination_folder)
-
-                    # Move the file
-                    try:
-                        shutil.move(file_path, destination_folder)
-                        logger.info(f"Moved {os.path.basename(file_path)} to {destination_folder}.")
-                        break # Stop checking rules for this file
-                    except Exception as e:
-                        logger.exception(f"Error moving {file_path}.")
-                        break
+        for file_path in walk_files(downloads_dir, max_depth, excluded_dirs):
+            sort_file(file_path, rules, destinations, moves)
     except PermissionError:
         logger.error("Permission denied accessing downloads folder")
     except Exception as e:
         logger.exception("Unexpected error in file_sorter")
+    finally:
+        history.record_moves(moves)
+
+def sort_files(file_paths):
+    """Moves the given files following the rules in config.yaml, without extracting archives again."""
+    downloads_dir = downloads_folder_path()
+    rules = get_rules()
+    if not rules or not downloads_dir:
+        return
+    destinations = resolve_destinations(rules, downloads_dir)
+    moves = []
+    try:
+        for file_path in file_paths:
+            sort_file(file_path, rules, destinations, moves, extract=False)
+    except Exception as e:
+        logger.exception("Unexpected error in sort_files")
+    finally:
+        history.record_moves(moves)
+
+def sort_file(file_path, rules, destinations, moves, extract=True):
+    """
+    Moves a single file to the destination of the first matching rule and appends the move to moves.
+    Archives moved by a rule with 'extract' set are queued for extraction when extract is True.
+    """
+    filename = os.path.basename(file_path)
+
+    # get file name and extension
+    file_name, file_extension = os.path.splitext(file_path)
+    base_name = os.path.splitext(filename)[0].lower()
+
+    # Check against each rule
+    for rule in rules:
+
+        # Check if the file extension matches
+        match_extension = file_extension in rule.get("extensions", [])
+        
+        # Check if any keyword matches the file name, never the folders it is in
+        match_keyword = False
+        if rule.get("keywords"):
+            match_keyword = any(keyword.lower() in base_name for keyword in rule["keywords"])
+
+        if match_extension or match_keyword:
+            destination = destinations[(rule["destination"], bool(rule.get("sub")))]
+            # check if destination folder exists
+            if not destination["exists"]:
+                continue
+            destination_folder = destination["path"]
+            
+            # Move the file
+            try:
+                with move_lock:
+                    file_path = get_final_name(file_path, file_name, file_extension, destination_folder)
+                    file_size = os.path.getsize(file_path)
+                    # Move to the full target path, so a destination removed since the last check
+                    # makes the move fail instead of renaming the file to the folder name
+                    target_path = os.path.join(destination_folder, os.path.basename(file_path))
+                    shutil.move(file_path, target_path)
+                logger.info(f"Moved {os.path.basename(file_path)} to {destination_folder}.")
+                moves.append((filename, target_path, rule.get("name"), file_size, time.time()))
+            except Exception as e:
+                logger.exception(f"Error moving {file_path}.")
+                # check the destinations again on the next pass
+                invalidate_paths()
+                return
+            # Never waits: the archive is only queued for the extraction workers
+            if extract and rule.get("extract"):
+                extractor.submit(target_path)
+            return # Stop checking rules for this file
+
+def walk_files(root_dir, max_depth, excluded_dirs=(), workers=4):
+    """
+    Yields the path of every file under root_dir down to max_depth levels of subfolders.
+    Folders are scanned in parallel and files are yielded as soon as they are found,
+    so the caller can sort them while the rest of the tree is still being scanned.
+    """
+    excluded = {os.path.normcase(os.path.abspath(path)) for path in excluded_dirs}
+    # bounded, so scanning never runs too far ahead of sorting
+    found = queue.Queue(maxsize=1000)
+    done = object()
+    stop_event = threading.Event()
+    pending_lock = threading.Lock()
+    pending = [0]
+
+    def put(item):
+        # give up if the caller stopped reading, instead of blocking the worker forever
+        while not stop_event.is_set():
+            try:
+                found.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def submit(path, depth):
+        with pending_lock:
+            pending[0] += 1
+        executor.submit(scan, path, depth)
+
+    def scan(path, depth):
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if stop_event.is_set():
+                        return
+                    try:
+                        if entry.is_file():
+                            put(entry.path)
+                        elif depth < max_depth and entry.is_dir(follow_symlinks=False):
+                            if os.path.normcase(os.path.abspath(entry.path)) not in excluded:
+                                submit(entry.path, depth + 1)
+                    except OSError:
+                        continue
+        except PermissionError:
+            logger.error(f"Permission denied accessing '{path}'")
+        except OSError:
+            logger.exception(f"Error scanning '{path}'")
+        finally:
+            with pending_lock:
+                pending[0] -= 1
+                finished = pending[0] == 0
+            if finished:
+                put(done)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="OrganizerWalk")
+    try:
+        submit(root_dir, 0)
+        while True:
+            item = found.get()
+            if item is done:
+                return
+            yield item
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
 def get_final_name(file_path, file_name, file_extension, destination_folder) -> str:
     """Renames the file if there is already a file with the same name in the destination folder"""
@@ -246,8 +485,8 @@ def get_final_name(file_path, file_name, file_extension, destination_folder) ->
 
 def create_folder(new_path):
     """Create folder in the Download folder"""
-    downloads_dir = locate_folder_path()
-    directory = os.path.join(downloads_dir, new_path)
+    downloads_dir = downloads_folder_path()
+    directory = normalize_destination(new_path, downloads_dir, True)
     try:
         # Create the entire path.
         os.makedirs(directory, exist_ok=True)